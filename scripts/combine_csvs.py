@@ -1,38 +1,62 @@
 #!/usr/bin/env python3
+import argparse
+import contextlib
 import csv
-import hashlib
 import os
 import sys
-from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, islice, repeat
+from operator import itemgetter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, TextIO, Tuple, Type
 
 
 def list_csvs(directory: str) -> List[str]:
-    return [
-        os.path.join(directory, f)
-        for f in sorted(os.listdir(directory))
-        if os.path.isfile(os.path.join(directory, f)) and f.lower().endswith('.csv')
-    ]
+    # scandir reports the entry type from the directory read itself, so regular
+    # files need no extra stat call each
+    with os.scandir(directory) as entries:
+        names = [e.name for e in entries if e.name.lower().endswith('.csv') and e.is_file()]
+    return [os.path.join(directory, f) for f in sorted(names)]
 
 
-def sniff_dialect(path: str) -> csv.Dialect:
-    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
-        sample = f.read(8192)
-        f.seek(0)
-        try:
-            return csv.Sniffer().sniff(sample)
-        except csv.Error:
-            return csv.excel
+# Buffer size for CSV streams; the 8 KiB default costs a syscall per 8 KiB read/written
+_IO_BUFFER = 1 << 20
 
+# Bytes read from the start of a file for dialect sniffing
+_SAMPLE_SIZE = 8192
+
+# Rows per prebuilt text block on the unquoted output fast path
+_RAW_CHUNK = 1024
+
+# Formatting attributes that fully describe a csv dialect
+_DIALECT_ATTRS = ('delimiter', 'quotechar', 'escapechar', 'doublequote',
+                  'skipinitialspace', 'lineterminator', 'quoting', 'strict')
+
+
+def _open_csv(path: str) -> TextIO:
+    return open(path, 'r', encoding='utf-8-sig', newline='', buffering=_IO_BUFFER)
+
+
+def _sniff_sample(sample: str) -> csv.Dialect:
+    try:
+        return csv.Sniffer().sniff(sample)
+    except csv.Error:
+        return csv.excel
+
+
+def dialect_for_delimiter(delimiter: str) -> Type[csv.Dialect]:
+    # Excel conventions with an explicit delimiter; used to bypass sniffing
+    return type('ExplicitDialect', (csv.excel,), {'delimiter': delimiter})
+
+
+def dialect_params(dialect: csv.Dialect) -> Dict[str, Any]:
+    # Sniffed dialects are classes created on the fly and cannot be pickled, so
+    # worker processes receive the plain formatting parameters instead
+    resolved = csv.reader([], dialect).dialect  # fills in defaults for unset attributes
+    return {name: getattr(resolved, name) for name in _DIALECT_ATTRS}
 
-def read_header(path: str, dialect: Optional[csv.Dialect] = None) -> List[str]:
-    if dialect is None:
-        dialect = sniff_dialect(path)
-    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
-        reader = csv.reader(f, dialect)
-        try:
-            return next(reader)
-        except StopIteration:
-            return []
+
+def is_unnamed(column: str) -> bool:
+    return (column or '').strip().startswith('Unnamed')
 
 
 def build_index_map(src_header: List[str], dst_header: List[str]) -> List[Optional[int]]:
@@ -41,24 +65,91 @@ def build_index_map(src_header: List[str], dst_header: List[str]) -> List[Option
     return [idx_by_name.get(name) for name in dst_header]
 
 
-def row_to_dst(row: List[str], idx_map: List[Optional[int]]) -> List[str]:
-    out: List[str] = []
-    for idx in idx_map:
-        if idx is None:
-            out.append('')
-        else:
-            if idx < len(row):
-                out.append(row[idx])
-            else:
-                out.append('')
-    return out
+def build_projector(src_header: List[str], dst_header: List[str]) -> Callable[[List[str]], Sequence[str]]:
+    # Build a per-file function that reorders a source row into dst_header order.
+    # Unless the source is already in dst_header order, the gather is a single
+    # itemgetter call (C level); columns missing from the source point at a
+    # trailing '' slot appended to short rows.
+    idx_map = build_index_map(src_header, dst_header)
+    width = len(src_header)
+    has_missing = any(idx is None for idx in idx_map)
+    pad_to = width + 1 if has_missing else width
+    positions = [width if idx is None else idx for idx in idx_map]
+    size = len(positions)
+
+    if not has_missing and positions == list(range(size)):
+        # Source columns already start in dst_header order (the usual case when all
+        # files share one header): rows pass through, trimmed or padded, no gather
+        def project_prefix(row: List[str]) -> Sequence[str]:
+            n = len(row)
+            if n == size:
+                return row
+            if n > size:
+                return row[:size]
+            row += [''] * (size - n)
+            return row
+
+        return project_prefix
+
+    if size == 1:
+        pos = positions[0]
+        get = lambda r: (r[pos],)  # itemgetter with one index returns a scalar
+    else:
+        get = itemgetter(*positions)
+
+    def project(row: List[str]) -> Sequence[str]:
+        n = len(row)
+        if n > width and has_missing:
+            # Extra trailing cells would shadow the '' slot for missing columns
+            row = row[:width] + ['']
+        elif n < pad_to:
+            row += [''] * (pad_to - n)
+        return get(row)
+
+    return project
+
+
+def iter_file_rows(path: str, canonical_header: List[str], fmtparams: Dict[str, Any],
+                   resniff: bool = False) -> Iterator[Sequence[str]]:
+    # Yield the data rows of one file, projected onto canonical_header. With resniff,
+    # a header that fails to parse or shares no column with canonical_header means the
+    # shared dialect does not fit this file, which is then sniffed on its own.
+    with _open_csv(path) as in_f:
+        reader = csv.reader(in_f, **fmtparams)
+        try:
+            src_header = next(reader)
+        except StopIteration:
+            return  # empty file
+        except csv.Error:
+            if not resniff:
+                raise
+            src_header = []
+
+        if resniff and set(src_header).isdisjoint(canonical_header):
+            in_f.seek(0)
+            sample = in_f.read(_SAMPLE_SIZE)
+            in_f.seek(0)
+            reader = csv.reader(in_f, _sniff_sample(sample))
+            src_header = next(reader, [])
+
+        # Build per-file projection from src->canonical
+        project = build_projector(src_header, canonical_header)
+        for row in reader:
+            yield project(row)
 
 
-def hash_row(cells: Iterable[str]) -> bytes:
-    h = hashlib.sha256()
-    # Use a non-occurring separator to avoid ambiguities; NUL is safe for CSV cell content
-    h.update('\0'.join(cells).encode('utf-8'))
-    return h.digest()
+def _parse_file(path: str, canonical_header: List[str], fmtparams: Dict[str, Any],
+                resniff: bool) -> List[Sequence[str]]:
+    # Worker entry point: parse a whole file so it can be shipped back in one piece
+    return list(iter_file_rows(path, canonical_header, fmtparams, resniff))
+
+
+def hash_row(cells: Iterable[str]) -> int:
+    # 64-bit non-cryptographic fingerprint; only used to key an in-process set.
+    # Hashing the tuple keeps cell boundaries, so no separator join is needed.
+    # Projected rows are already tuples and are hashed in place: nothing is joined,
+    # encoded or copied per row, and each cell string caches its own hash.
+    return hash(cells if type(cells) is tuple else tuple(cells))
 
 
 def _normalize_for_key(val: str) -> str:
@@ -68,41 +159,167 @@ def _normalize_for_key(val: str) -> str:
     - unify case for strings
     - collapse floats with .0 to integer-like strings
     """
-    s = (val or '').strip()
-    # common float-as-int pattern (e.g., '1.0' -> '1')
-    if s.replace('.', '', 1).isdigit():
-        try:
-            f = float(s)
-            if f.is_integer():
-                return str(int(f))
-        except Exception:
-            pass
+    s = val.strip() if val else ''
+    # common float-as-int pattern (e.g., '1.0' -> '1'), decided on the string itself:
+    # digits, optionally followed by a fraction made only of zeros
+    whole, _, frac = s.partition('.')
+    if (whole.isdecimal() or (not whole and frac)) and not frac.strip('0'):
+        return str(int(whole)) if whole else '0'
     return s.lower()
 
 
-def combine_csvs(input_dir: str, output_csv: str) -> Dict[str, int]:
+class _NormalizedKeyCache(dict):
+    # Memoizes _normalize_for_key per cell value. Key columns repeat heavily (a
+    # game_id covers ~150 plays, play_ids recur across games), and a hit is a plain
+    # C-level dict lookup; only unseen values run the normalizer.
+    def __missing__(self, val: str) -> str:
+        norm = self[val] = _normalize_for_key(val)
+        return norm
+
+
+def _add_totals(totals: Dict[str, int], n_files: int, n_in: int, n_dup: int) -> None:
+    totals['files'] += n_files
+    totals['rows_in'] += n_in
+    totals['duplicates_skipped'] += n_dup
+    totals['rows_out'] += n_in - n_dup
+
+
+def _unique_by_key(batches: Iterable[Iterable[Sequence[str]]], key_get: Callable[[Sequence[str]], Tuple[str, ...]],
+                   totals: Dict[str, int]) -> Iterator[Sequence[str]]:
+    # Yield rows whose normalized key cells have not been seen. The hot loop keeps
+    # counters in locals and binds methods once: no dict updates or attribute lookups
+    # per row.
+    # seen holds int fingerprints instead of tuples of strings, for both raw and
+    # normalized keys: an exact repeat of a raw key is a duplicate without paying for
+    # normalization. Sharing one set is safe because normalizing is idempotent, so a
+    # raw key equal to a seen normalized key is a duplicate too, and keys that are
+    # already normalized take a single entry instead of two.
+    seen: set[int] = set()
+    seen_add = seen.add
+    normalize = _NormalizedKeyCache().__getitem__
+    n_files = n_in = n_dup = 0
+    try:
+        for rows in batches:
+            n_files += 1
+            for out_row in rows:
+                n_in += 1
+                raw_key = key_get(out_row)
+                raw_hash = hash(raw_key)
+                if raw_hash in seen:
+                    n_dup += 1
+                    continue
+                # Fingerprint of the normalized key cells, looked up before the raw
+                # hash is added: an already normalized raw key hashes to its own k_hash
+                k_hash = hash(tuple(map(normalize, raw_key)))
+                is_dup = k_hash in seen
+                seen_add(raw_hash)
+                if is_dup:
+                    n_dup += 1
+                    continue
+                seen_add(k_hash)
+                yield out_row
+    finally:
+        _add_totals(totals, n_files, n_in, n_dup)
+
+
+def _unique_by_row(batches: Iterable[Iterable[Sequence[str]]], totals: Dict[str, int]) -> Iterator[Sequence[str]]:
+    # Yield rows whose full contents have not been seen
+    seen: set[int] = set()
+    seen_add = seen.add
+    n_files = n_in = n_dup = 0
+    try:
+        for rows in batches:
+            n_files += 1
+            for out_row in rows:
+                n_in += 1
+                row_hash = hash_row(out_row)
+                if row_hash in seen:
+                    n_dup += 1
+                    continue
+                seen_add(row_hash)
+                yield out_row
+    finally:
+        _add_totals(totals, n_files, n_in, n_dup)
+
+
+def _write_rows(out_f: TextIO, writer, rows: Iterable[Sequence[str]], width: int) -> None:
+    # csv.writer scans every cell for characters that need quoting. While rows need
+    # none, chunks are joined into text and written directly; a chunk qualifies when
+    # its text has no quote character and exactly the delimiters and line-terminator
+    # characters that the joins themselves put in. The first chunk that needs quoting
+    # goes through csv.writer, as does everything after it.
+    rows = iter(rows)
+    d = writer.dialect
+    term = d.lineterminator
+    # A lone empty cell is written as "" by csv.writer, so one column never qualifies
+    if width > 1:
+        seps_per_row = width - 1
+        while True:
+            chunk = list(islice(rows, _RAW_CHUNK))
+            if not chunk:
+                return
+            n = len(chunk)
+            block = term.join(map(d.delimiter.join, chunk))
+            plain = (d.quotechar not in block
+                     and block.count(d.delimiter) == n * seps_per_row
+                     and block.count('\r') == (n - 1) * term.count('\r')
+                     and block.count('\n') == (n - 1) * term.count('\n'))
+            if not plain:
+                writer.writerows(chunk)
+                break
+            out_f.write(block)
+            out_f.write(term)
+    writer.writerows(rows)
+
+
+def combine_csvs(input_dir: str, output_csv: str, delimiter: Optional[str] = None, jobs: int = 1,
+                 sniff: bool = True) -> Dict[str, int]:
     files = list_csvs(input_dir)
     if not files:
         raise SystemExit(f'No CSV files found in {input_dir}')
 
-    # Determine canonical header from the first non-empty CSV
+    # Sniffing is the expensive part of opening a file, so it runs once, on the first
+    # non-empty file, and every file is read with that dialect; iter_file_rows only
+    # re-sniffs a file whose header does not parse under it. An explicit delimiter or
+    # sniff=False (plain excel) skips sniffing altogether.
+    if delimiter:
+        dialect: Optional[csv.Dialect] = dialect_for_delimiter(delimiter)
+    elif not sniff:
+        dialect = csv.excel
+    else:
+        dialect = None
+    resniff = dialect is None
+
+    # Determine canonical header from the first non-empty CSV. That file is opened
+    # once: the sniff sample, the header and its rows all come from the same stream,
+    # and the rest of the stream becomes the first file's batch in the main loop.
+    # Pandas index spill-over columns ('Unnamed: 0', ...) are dropped here, so inputs
+    # do not need a separate remove_unnamed_columns.py rewrite first; source columns
+    # not in the canonical header are skipped by the projection
     canonical_header: List[str] = []
-    first_header_path: Optional[str] = None
-    for path in files:
-        hdr = read_header(path)
-        if hdr:
-            canonical_header = hdr
-            first_header_path = path
+    first_f: Optional[TextIO] = None
+    for first_idx, path in enumerate(files):
+        in_f = _open_csv(path)
+        if dialect is None:
+            sample = in_f.read(_SAMPLE_SIZE)
+            if not sample:
+                in_f.close()
+                continue  # empty file
+            in_f.seek(0)
+            dialect = _sniff_sample(sample)
+        first_reader = csv.reader(in_f, dialect)
+        first_src_header = next(first_reader, [])
+        canonical_header = [h for h in first_src_header if not is_unnamed(h)]
+        if canonical_header:
+            first_f = in_f
             break
-    if not canonical_header:
+        in_f.close()
+    if first_f is None:
         raise SystemExit('All CSV files are empty; nothing to combine.')
+    first_rows = map(build_projector(first_src_header, canonical_header), first_reader)
 
     os.makedirs(os.path.dirname(output_csv), exist_ok=True)
 
-    # Duplicate tracking
-    seen_full_rows = set()  # fall back to full-row hash when key not available
-    seen_keys: set[Tuple[str, ...]] = set()
-
     # Prefer deduplication by these key columns when present
     KEY_COLUMNS: Sequence[str] = ("game_id", "play_id")
     key_idx: Optional[List[Optional[int]]] = None
@@ -113,7 +330,7 @@ def combine_csvs(input_dir: str, output_csv: str) -> Dict[str, int]:
         'rows_out': 0,
     }
 
-    with open(output_csv, 'w', encoding='utf-8', newline='') as out_f:
+    with first_f, open(output_csv, 'w', encoding='utf-8', newline='', buffering=_IO_BUFFER) as out_f:
         writer = csv.writer(out_f)
         writer.writerow(canonical_header)
 
@@ -121,59 +338,58 @@ def combine_csvs(input_dir: str, output_csv: str) -> Dict[str, int]:
         idx_by_name: Dict[str, int] = {name: i for i, name in enumerate(canonical_header)}
         key_idx = [idx_by_name.get(name) for name in KEY_COLUMNS]
         use_key = all(i is not None for i in key_idx)
-
-        for path in files:
-            totals['files'] += 1
-            dialect = sniff_dialect(path)
-            with open(path, 'r', encoding='utf-8-sig', newline='') as in_f:
-                reader = csv.reader(in_f, dialect)
-                try:
-                    src_header = next(reader)
-                except StopIteration:
-                    continue  # empty file
-
-                # Build per-file index map from src->canonical
-                idx_map = build_index_map(src_header, canonical_header)
-
-                for row in reader:
-                    totals['rows_in'] += 1
-                    out_row = row_to_dst(row, idx_map)
-                    is_dup = False
-                    if use_key:
-                        # Construct normalized key tuple
-                        k_tuple = tuple(_normalize_for_key(out_row[i]) for i in key_idx if i is not None)
-                        if k_tuple in seen_keys:
-                            totals['duplicates_skipped'] += 1
-                            is_dup = True
-                        else:
-                            seen_keys.add(k_tuple)
-                    if not use_key and not is_dup:
-                        # Fallback to full-row hash equality
-                        key_hash = hash_row(out_row)
-                        if key_hash in seen_full_rows:
-                            totals['duplicates_skipped'] += 1
-                            is_dup = True
-                        else:
-                            seen_full_rows.add(key_hash)
-                    if is_dup:
-                        continue
-                    writer.writerow(out_row)
-                    totals['rows_out'] += 1
+        # Fetch all key cells of a row in one C-level call
+        key_get = itemgetter(*key_idx) if use_key else None
+
+        # Parsing is independent per file and can run in worker processes; dedup and
+        # writing stay in this process, consuming files in order, so the output is
+        # identical whatever the number of jobs
+        fmtparams = dialect_params(dialect)
+        pool = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else contextlib.nullcontext()
+        with pool as executor:
+            def parse(paths: List[str]) -> Iterable[Iterable[Sequence[str]]]:
+                if executor is None:
+                    return map(iter_file_rows, paths, repeat(canonical_header), repeat(fmtparams), repeat(resniff))
+                return executor.map(_parse_file, paths, repeat(canonical_header), repeat(fmtparams), repeat(resniff))
+
+            batches = chain(parse(files[:first_idx]), [first_rows], parse(files[first_idx + 1:]))
+
+            # Dedup runs inside a generator so writerows() drives the whole stream from
+            # C instead of one writerow() call per row. The keyed/full-row choice is
+            # made once here rather than per row.
+            if use_key:
+                unique_rows = _unique_by_key(batches, key_get, totals)
+            else:
+                # Fallback to full-row hash equality when key columns are unavailable
+                unique_rows = _unique_by_row(batches, totals)
+            _write_rows(out_f, writer, unique_rows, len(canonical_header))
 
     return totals
 
 
 def main(argv: List[str]) -> int:
-    if len(argv) not in (3,):
-        print('Usage: combine_csvs.py <input_dir> <output_csv>')
-        return 2
-    input_dir = argv[1]
-    output_csv = argv[2]
+    parser = argparse.ArgumentParser(prog='combine_csvs.py', description='Combine and de-duplicate CSV files.')
+    parser.add_argument('input_dir')
+    parser.add_argument('output_csv')
+    dialect_group = parser.add_mutually_exclusive_group()
+    dialect_group.add_argument('--delimiter', help='input delimiter; skips dialect sniffing')
+    dialect_group.add_argument('--no-sniff', action='store_true',
+                               help='read every file as standard comma-separated CSV without sniffing')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='worker processes for parsing input files (0 = one per CPU; default 1)')
+    args = parser.parse_args(argv[1:])
+    if args.delimiter is not None and len(args.delimiter) != 1:
+        parser.error('--delimiter must be a single character')
+    if args.jobs < 0:
+        parser.error('--jobs must be >= 0')
+    jobs = args.jobs or os.cpu_count() or 1
+    input_dir = args.input_dir
+    output_csv = args.output_csv
     if not os.path.isdir(input_dir):
         print(f'Not a directory: {input_dir}')
         return 2
 
-    stats = combine_csvs(input_dir, output_csv)
+    stats = combine_csvs(input_dir, output_csv, delimiter=args.delimiter, jobs=jobs, sniff=not args.no_sniff)
     print(f"Processed {stats['files']} file(s)")
     print(f"Rows read: {stats['rows_in']}")
     print(f"Duplicates removed: {stats['duplicates_skipped']}")
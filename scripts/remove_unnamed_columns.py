@@ -1,25 +1,86 @@
 #!/usr/bin/env python3
+# Rewrites CSV files in place without their 'Unnamed*' columns. combine_csvs.py
+# already drops these columns while combining, so this is only needed when the
+# individual files themselves should be cleaned.
 import csv
 import os
 import sys
 import tempfile
-from typing import List
+from itertools import chain
+from operator import itemgetter
+from typing import Callable, Iterator, List, Optional, Sequence, TextIO
+
+# Buffer size for CSV streams; the 8 KiB default costs a syscall per 8 KiB read/written
+_IO_BUFFER = 1 << 20
 
 
 def find_csv_files(directory: str) -> List[str]:
-    files = []
-    for entry in sorted(os.listdir(directory)):
-        path = os.path.join(directory, entry)
-        if os.path.isfile(path) and entry.lower().endswith('.csv'):
-            files.append(path)
-    return files
+    # scandir reports the entry type from the directory read itself, so regular
+    # files need no extra stat call each
+    with os.scandir(directory) as entries:
+        names = [e.name for e in entries if e.name.lower().endswith('.csv') and e.is_file()]
+    return [os.path.join(directory, entry) for entry in sorted(names)]
+
+
+def _spans_copyable(dialect: csv.Dialect) -> bool:
+    # Raw text spans read back the same as re-written cells only under plain
+    # QUOTE_MINIMAL conventions
+    return (dialect.quoting == csv.QUOTE_MINIMAL and bool(dialect.quotechar)
+            and not dialect.escapechar and not dialect.skipinitialspace)
+
+
+def _count_fields(body: str, d: str, q: str, doublequote: bool) -> Optional[int]:
+    # Field count of a one-line record whose quotes all wrap whole cells; None when
+    # the record needs the csv module (open quoted cell, quote inside a cell, ...)
+    if q not in body:
+        return body.count(d) + 1
+    segments = body.split(q)
+    if not len(segments) % 2:
+        return None  # odd number of quotes: a quoted cell continues on the next line
+    # Even-numbered segments lie outside quotes and must border quotes at cell edges
+    outside = segments[::2]
+    first, last = outside[0], outside[-1]
+    if (first and not first.endswith(d)) or (last and not last.startswith(d)):
+        return None
+    for seg in outside[1:-1]:
+        if seg:
+            if not (seg.startswith(d) and seg.endswith(d)):
+                return None
+        elif not doublequote:
+            return None  # "" is only an escaped quote under doublequote
+    return sum(seg.count(d) for seg in outside) + 1
+
+
+def _write_leading_spans(lines: Iterator[str], out: TextIO, writer, dialect: csv.Dialect,
+                         get: Callable[[List[str]], Sequence[str]], n: int, removed: int) -> None:
+    # Only trailing columns are removed: copy each record's text up to the first
+    # removed cell instead of parsing and re-quoting every cell. Records with an
+    # unusual layout or field count, or quotes in the removed tail, go through the
+    # csv module as before.
+    d = dialect.delimiter
+    q = dialect.quotechar
+    doublequote = dialect.doublequote
+    term = dialect.lineterminator
+    write = out.write
+    for line in lines:
+        body = line.rstrip('\r\n')
+        if _count_fields(body, d, q, doublequote) == n:
+            kept = body.rsplit(d, removed)[0]
+            if q not in body[len(kept):]:
+                write(kept)
+                write(term)
+                continue
+        row = next(csv.reader(chain([line], lines), dialect), [])
+        if len(row) < n:
+            row = row + [''] * (n - len(row))
+        writer.writerow(get(row))
 
 
 def remove_unnamed_columns(csv_path: str) -> int:
     # Returns number of columns removed; 0 if none.
     # Use utf-8-sig to transparently handle BOM in header.
     # Detect dialect to preserve delimiter/quoting.
-    with open(csv_path, 'r', encoding='utf-8-sig', newline='') as f:
+    with open(csv_path, 'r', encoding='utf-8-sig', newline='', buffering=_IO_BUFFER) as f:
         sample = f.read(8192)
         f.seek(0)
         try:
@@ -39,18 +100,35 @@ def remove_unnamed_columns(csv_path: str) -> int:
         if removed == 0:
             return 0
 
+        # Select kept cells with one C-level call per row; itemgetter returns a
+        # scalar rather than a tuple when given a single index
+        if not keep_idx:
+            get = lambda r: ()
+        elif len(keep_idx) == 1:
+            only = keep_idx[0]
+            get = lambda r: (r[only],)
+        else:
+            get = itemgetter(*keep_idx)
+        n = len(header)
+
+        def filtered_rows() -> Iterator[Sequence[str]]:
+            for row in reader:
+                # Pad row if short (defensive)
+                if len(row) < n:
+                    row = row + [''] * (n - len(row))
+                yield get(row)
+
         # Write filtered data to a temporary file in the same directory
         dir_name = os.path.dirname(csv_path)
-        with tempfile.NamedTemporaryFile('w', delete=False, dir=dir_name, suffix='.csv', encoding='utf-8', newline='') as tmp:
+        with tempfile.NamedTemporaryFile('w', buffering=_IO_BUFFER, delete=False, dir=dir_name, suffix='.csv', encoding='utf-8', newline='') as tmp:
             writer = csv.writer(tmp, dialect)
             # Write filtered header
-            writer.writerow([header[i] for i in keep_idx])
+            writer.writerow(get(header))
             # Write filtered rows
-            for row in reader:
-                # Pad row if short (defensive)
-                if len(row) < len(header):
-                    row = row + [''] * (len(header) - len(row))
-                writer.writerow([row[i] for i in keep_idx])
+            if len(keep_idx) > 1 and keep_idx[-1] == len(keep_idx) - 1 and _spans_copyable(writer.dialect):
+                _write_leading_spans(f, tmp, writer, writer.dialect, get, n, removed)
+            else:
+                writer.writerows(filtered_rows())
             tmp_path = tmp.name
 
     # Atomically replace original file